@@ -1,7 +1,14 @@
 # app.py
 
-from flask import Flask, jsonify, request
+from flask import Flask, request
+from cachetools import TTLCache
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Tuple
+import hashlib
 import logging
+import orjson
+import threading
+import time
 
 from config import NEWS_SOURCES, API_HOST, API_PORT, API_DEBUG
 from scraper import scrape_news_sources
@@ -16,87 +23,140 @@ app = Flask(__name__, template_folder='templates', static_folder='static')
 # CORS might not be strictly needed now, but doesn't hurt to leave it
 CORS(app)
 
+def json_response(data, status=200):
+    """Serializes with orjson, which is considerably faster than jsonify on large cluster lists."""
+    return app.response_class(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY), status=status, mimetype='application/json')
+
 # --- Add Route to Serve the Frontend ---
 @app.route('/') # Serve index.html at the root URL
 def index():
     # Renders the templates/index.html file
     return render_template('index.html')
 
-# --- In-memory Cache for API results (Simple Caching) ---
-# In a real app, use Redis, Memcached, or a proper caching library/database.
-# Also, implement cache invalidation (e.g., time-based).
-API_CACHE = {
+# --- In-memory Cache for API results (TTL cache + stale-while-revalidate) ---
+# Entries are keyed by the configured source URLs plus a version, so changing the sources
+# (or bumping CACHE_VERSION) invalidates them. For multi-instance deployments use Redis instead.
+CACHE_TTL_SECONDS = 60 * 30 # Cache results for 30 minutes
+CACHE_VERSION = 1
+CACHE_KEY = (CACHE_VERSION,) + tuple(source['url'] for source in NEWS_SOURCES)
+API_CACHE = TTLCache(maxsize=1, ttl=CACHE_TTL_SECONDS)
+# Last good result, kept after the TTL entry expires so it can be served while a refresh runs
+STALE_CACHE = {
     'clustered_news': None,
     'last_updated': None
 }
-CACHE_TTL_SECONDS = 60 * 30 # Cache results for 30 minutes
-
-# --- API Endpoint ---
-
-@app.route('/api/news/clusters', methods=['GET'])
-def get_news_clusters():
+_CACHE_LOCK = threading.Lock() # TTLCache is not thread-safe
+
+# Request coalescing: concurrent cache misses share one in-flight refresh instead of each scraping
+_IN_FLIGHT: Dict[Tuple, Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+REFRESH_TIMEOUT_SECONDS = 120 # A cold geocoding cache can take over a minute at Nominatim's 1 req/s
+
+def _get_cached_entry():
+    with _CACHE_LOCK:
+        return API_CACHE.get(CACHE_KEY)
+
+def _stream_clusters(clusters):
+    # One cluster serialized at a time: the first bytes go out before the whole list is encoded
+    yield b'['
+    for i, cluster in enumerate(clusters):
+        if i:
+            yield b','
+        yield orjson.dumps(cluster, option=orjson.OPT_SERIALIZE_NUMPY)
+    yield b']'
+
+def clusters_response(entry):
     """
-    API endpoint to retrieve news articles clustered by location.
-    Uses a simple time-based cache.
+    Returns cached clusters with an ETag and Cache-Control header so clients/CDNs can reuse them
+    for the rest of the cache window, answering matching If-None-Match requests with 304.
     """
-    import time
-    now = time.time()
-
-    # Check cache
-    if API_CACHE['clustered_news'] and API_CACHE['last_updated'] and (now - API_CACHE['last_updated'] < CACHE_TTL_SECONDS):
-        logging.info("Serving clustered news data from cache.")
-        return jsonify(API_CACHE['clustered_news'])
-
+    etag = hashlib.md5(str(entry['last_updated']).encode()).hexdigest()
+    max_age = max(0, int(CACHE_TTL_SECONDS - (time.time() - entry['last_updated'])))
+    if request.if_none_match.contains_weak(etag): # Weak comparison, per RFC 9110 for If-None-Match
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(_stream_clusters(entry['clustered_news']), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return response
+
+def _refresh_clusters():
+    """Scrapes and processes fresh news data into both caches. Returns the new entry, or None on failure."""
     logging.info("Cache miss or expired. Fetching and processing fresh news data for constituency grouping....")
     try:
+        now = time.time()
         # 1. Scrape Data
         articles = scrape_news_sources(NEWS_SOURCES)
         if not articles:
-             # Return potentially stale cache data if scraping fails, or an error
-             if API_CACHE['clustered_news']:
-                 logging.warning("Scraping failed, returning stale cache data.")
-                 return jsonify(API_CACHE['clustered_news'])
-             else:
-                 return jsonify({"error": "Failed to scrape news sources and no cache available."}), 500
-
-
-        # 2. Process and Cluster Data
-        # clustered_data = process_and_group_articles(articles)
-        # # 3. Update Cache
-        # API_CACHE['clustered_news'] = clustered_data
-        # API_CACHE['last_updated'] = now
-        # logging.info("Successfully updated API cache with fresh data.")
-        # 4. Return Data
-        # return jsonify(clustered_data)
-
-        # 2. Process and Group Data by Constituency
-        # This function now returns a dictionary keyed by constituency name
+            logging.warning("Scraping returned no articles.")
+            return None
+
+        # 2. Process and Group Data by coordinates (clusters carry their constituency)
         grouped_data = process_and_group_articles(articles)
 
         # 3. Update Cache
-        API_CACHE['clustered_news'] = grouped_data
-        API_CACHE['last_updated'] = now
+        entry = {'clustered_news': grouped_data, 'last_updated': now}
+        with _CACHE_LOCK:
+            API_CACHE[CACHE_KEY] = entry
+        STALE_CACHE.update(entry)
         logging.info("Successfully updated API cache with constituency-grouped data.")
-       
-        # 4. Return Data (jsonify handles the dictionary structure)
-        return jsonify(grouped_data)
+        return entry
+    except Exception:
+        logging.exception("An error occurred while refreshing news data.")
+        return None
+
+def _get_or_start_refresh() -> Future:
+    """Returns the in-flight refresh, submitting a new one if none is running."""
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(CACHE_KEY)
+        if future is not None:
+            return future
+        future = _IN_FLIGHT[CACHE_KEY] = _REFRESH_EXECUTOR.submit(_refresh_clusters)
+
+    def _clear_in_flight(done_future):
+        with _IN_FLIGHT_LOCK:
+            if _IN_FLIGHT.get(CACHE_KEY) is done_future:
+                del _IN_FLIGHT[CACHE_KEY]
+    # Registered outside the lock: the callback runs immediately if the refresh already finished
+    future.add_done_callback(_clear_in_flight)
+    return future
+
+# --- API Endpoint ---
 
-        
+@app.route('/api/news/clusters', methods=['GET'])
+def get_news_clusters():
+    """
+    API endpoint to retrieve news articles clustered by location.
+    Uses a TTL cache; on expiry stale data is served while a single background refresh runs.
+    """
+    # Check cache
+    entry = _get_cached_entry()
+    if entry:
+        logging.info("Serving clustered news data from cache.")
+        return clusters_response(entry)
+
+    future = _get_or_start_refresh()
+    if STALE_CACHE['clustered_news']:
+        logging.info("Refresh in progress, serving stale cache data.")
+        return clusters_response(STALE_CACHE)
+
+    # Nothing to fall back on yet: wait for the shared refresh
+    try:
+        entry = future.result(timeout=REFRESH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        logging.error(f"News refresh did not finish within {REFRESH_TIMEOUT_SECONDS}s.")
+        return json_response({"error": "News data is still being prepared, please retry shortly."}, 503)
 
-    except Exception as e:
-        logging.exception("An error occurred while processing the request.")
-        # Return potentially stale cache data on error, or a generic error
-        if API_CACHE['clustered_news']:
-             logging.warning("Processing failed, returning stale cache data.")
-             return jsonify(API_CACHE['clustered_news'])
-        else:
-            return jsonify({"error": "An internal server error occurred."}), 500
+    if entry is None:
+        return json_response({"error": "Failed to fetch news data and no cache available."}, 500)
+    return clusters_response(entry)
 
 # --- Basic Health Check Endpoint ---
 @app.route('/health', methods=['GET'])
 def health_check():
     """A simple health check endpoint."""
-    return jsonify({"status": "ok"}), 200
+    return json_response({"status": "ok"}, 200)
 
 
 # --- Main Execution ---
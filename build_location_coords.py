@@ -0,0 +1,42 @@
+# build_location_coords.py
+"""
+Geocodes every entry in SINGAPORE_LOCATIONS once and writes the results to LOCATION_COORDS_FILE,
+so the app can look coordinates up instead of calling Nominatim at runtime.
+Run it offline whenever the location lists in config.py change:  python build_location_coords.py
+"""
+
+import json
+import logging
+import time
+
+from geopy.geocoders import Nominatim
+
+from config import SINGAPORE_LOCATIONS, GEOCODER_USER_AGENT, GEOCODER_REQUEST_INTERVAL, LOCATION_COORDS_FILE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
+
+
+def build_location_coords():
+    geolocator = Nominatim(user_agent=GEOCODER_USER_AGENT)
+    coords = {}
+    for loc in sorted(SINGAPORE_LOCATIONS):
+        time.sleep(GEOCODER_REQUEST_INTERVAL) # Respect Nominatim usage policy
+        try:
+            location_data = geolocator.geocode(f"{loc}, Singapore", exactly_one=True, timeout=10)
+        except Exception as e:
+            log.warning(f"Geocoding error for '{loc}': {e}")
+            continue
+        if location_data:
+            coords[loc] = [location_data.latitude, location_data.longitude]
+            log.info(f"Geocoded '{loc}' to {coords[loc]}")
+        else:
+            log.warning(f"Could not geocode location: {loc}")
+
+    with open(LOCATION_COORDS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(coords, f, indent=2, sort_keys=True)
+    log.info(f"Wrote {len(coords)}/{len(SINGAPORE_LOCATIONS)} location coordinates to {LOCATION_COORDS_FILE}")
+
+
+if __name__ == '__main__':
+    build_location_coords()
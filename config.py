@@ -1,5 +1,10 @@
 # config.py (Combined Filtering and Updated Locations)
 import os
+import json
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # --- News Sources Configuration ---
@@ -43,19 +48,50 @@ _electoral_districts_2025 = [
     "Jurong", "Clementi", "Marsiling", "Yew Tee", "Pasir Ris", "Sengkang"
 ]
 
-# Combine lists and remove duplicates using a set, then convert back to list
-SINGAPORE_LOCATIONS = list(set(_general_locations + _electoral_districts_2025))
+# Combine lists and remove duplicates, then freeze in a stable order: longest names first so
+# more specific names (e.g. "Jurong-Clementi") are tried before their prefixes ("Jurong")
+SINGAPORE_LOCATIONS = tuple(sorted(set(_general_locations + _electoral_districts_2025), key=lambda s: (-len(s), s)))
 # Optional: Print the final list length for verification during startup
 # print(f"Loaded {len(SINGAPORE_LOCATIONS)} unique Singapore locations/districts for filtering.")
 
 
+# Pre-geocoded coordinates for SINGAPORE_LOCATIONS, generated offline by build_location_coords.py.
+# Keyed by lower-cased location name. The file is not shipped: until the script has been run the
+# table is empty and every location goes through the live geocoder fallback.
+LOCATION_COORDS_FILE = os.path.join(BASE_DIR, 'data', 'location_coords.json')
+def _load_location_coords(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return {name.lower(): tuple(coords) for name, coords in json.load(f).items()}
+SINGAPORE_LOCATION_COORDS = _load_location_coords(LOCATION_COORDS_FILE)
+
+
 # --- Geospatial Configuration ---
 ELECTORAL_BOUNDARIES_FILE = os.path.join(BASE_DIR, 'data', 'doc.kml') # Use the KML file
+ELECTORAL_BOUNDARIES_CACHE_FILE = os.path.join(BASE_DIR, 'data', 'boundaries.parquet') # Generated from the KML on first load
 CONSTITUENCY_COLUMN_NAME = 'Name' # Use the correct column name from KML
+BOUNDARY_SIMPLIFY_TOLERANCE = 1e-4 # Degrees (~11 m); drops redundant KML vertices before point-in-polygon tests
 
 # --- Geocoding Configuration ---
 GEOCODER_USER_AGENT = "singapore_news_mapper_app_v0.5" # Increment version maybe
-GEOCODING_CACHE = {}
+GEOCODER_FALLBACK_ENABLED = True # Geocode live when a location is missing from SINGAPORE_LOCATION_COORDS
+# Persisted to disk (when diskcache is installed) so geocoded locations survive restarts
+GEOCODING_CACHE_DIR = os.path.join(BASE_DIR, 'data', 'geocode_cache')
+GEOCODING_CACHE = diskcache.Cache(GEOCODING_CACHE_DIR) if diskcache else {}
+GEOCODING_FAILURE_TTL_SECONDS = 60 * 60 * 24 # Failed lookups are retried after a day
+def store_geocode_result(cache_key, coords):
+    # Single place for the cache policy used by both the Flask backend and the Streamlit app:
+    # failed lookups (None) expire from the persistent cache so transient errors get retried later
+    if coords is None and hasattr(GEOCODING_CACHE, 'set'):
+        GEOCODING_CACHE.set(cache_key, None, expire=GEOCODING_FAILURE_TTL_SECONDS)
+    else:
+        GEOCODING_CACHE[cache_key] = coords
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+# Public Nominatim allows 1 request/second; raise concurrency only against a self-hosted instance
+GEOCODER_MAX_CONCURRENCY = 1
+GEOCODER_REQUEST_INTERVAL = 1.0 # Minimum seconds between geocoding requests, across all callers
+GEOCODER_MAX_BACKOFF_SECONDS = 30 # Upper bound on a 429 backoff (incl. Retry-After), so a refresh never stalls for long
 
 # --- API Configuration ---
 API_HOST = '0.0.0.0'
@@ -2,8 +2,9 @@
 
 import logging
 from typing import List, Dict, Optional, Tuple, Set
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+import aiohttp
+import asyncio
+import threading
 import time
 import re
 import os
@@ -11,7 +12,7 @@ import os
 # --- Geospatial Imports ---
 try:
     import geopandas as gpd
-    from shapely.geometry import Point
+    import shapely
     GEOPANDAS_AVAILABLE = True
 except ImportError:
     GEOPANDAS_AVAILABLE = False
@@ -19,18 +20,22 @@ except ImportError:
 # --- Config Imports ---
 from config import (
     SINGAPORE_LOCATIONS, GEOCODER_USER_AGENT, GEOCODING_CACHE,
-    ELECTORAL_BOUNDARIES_FILE, CONSTITUENCY_COLUMN_NAME
+    ELECTORAL_BOUNDARIES_FILE, ELECTORAL_BOUNDARIES_CACHE_FILE, CONSTITUENCY_COLUMN_NAME,
+    NOMINATIM_SEARCH_URL, GEOCODER_MAX_CONCURRENCY, GEOCODER_REQUEST_INTERVAL, GEOCODER_MAX_BACKOFF_SECONDS,
+    store_geocode_result
 )
 
 log = logging.getLogger(__name__)
 
 # --- Global boundary data (Keep loading logic as is) ---
 boundaries_gdf = None
-boundaries_spatial_index = None
+# Lower-cased constituency name -> (lat, lon) of a point inside it, so locations that are
+# constituency names skip geocoding
+constituency_points = {}
 
 def load_electoral_boundaries():
     # ... (Keep the existing load_electoral_boundaries function exactly as it was) ...
-    global boundaries_gdf, boundaries_spatial_index
+    global boundaries_gdf, constituency_points
     if not GEOPANDAS_AVAILABLE:
         log.error("Geopandas library not found. Cannot perform constituency mapping.")
         return False
@@ -38,15 +43,24 @@ def load_electoral_boundaries():
         return True
 
     file_path = ELECTORAL_BOUNDARIES_FILE
-    if not os.path.exists(file_path):
+    cache_path = ELECTORAL_BOUNDARIES_CACHE_FILE
+    # The parquet cache is reused unless the source boundary file is newer
+    use_cache = os.path.exists(cache_path) and (
+        not os.path.exists(file_path) or os.path.getmtime(cache_path) >= os.path.getmtime(file_path)
+    )
+    if not use_cache and not os.path.exists(file_path):
         log.error(f"Electoral boundaries file not found at: {file_path}")
         return False
 
     try:
-        log.info(f"Loading electoral boundaries from: {file_path}")
-        # --- Ensure KML driver is specified if using KMZ ---
-        driver = 'KML' if file_path.lower().endswith('.kmz') else None
-        temp_gdf = gpd.read_file(file_path, driver=driver)
+        if use_cache:
+            log.info(f"Loading cached electoral boundaries from: {cache_path}")
+            temp_gdf = gpd.read_parquet(cache_path)
+        else:
+            log.info(f"Loading electoral boundaries from: {file_path}")
+            # --- Ensure KML driver is specified if using KMZ ---
+            driver = 'KML' if file_path.lower().endswith('.kmz') else None
+            temp_gdf = gpd.read_file(file_path, driver=driver)
 
         if CONSTITUENCY_COLUMN_NAME not in temp_gdf.columns:
              log.error(f"Specified constituency column '{CONSTITUENCY_COLUMN_NAME}' not found in boundary file.")
@@ -61,96 +75,162 @@ def load_electoral_boundaries():
             log.info(f"Converting boundaries from CRS {temp_gdf.crs} to EPSG:4326")
             temp_gdf = temp_gdf.to_crs(epsg=4326)
 
+        if not use_cache:
+            try:
+                temp_gdf.to_parquet(cache_path)
+                log.info(f"Cached electoral boundaries to: {cache_path}")
+            except Exception as e:
+                log.warning(f"Could not write boundary cache file {cache_path}: {e}")
+
+        # Prepare the polygons in place once (after the parquet write, which cannot store the prepared state).
+        # For predicate='within' sjoin indexes the points and queries with the polygons as input geometries,
+        # which is where GEOS uses the prepared versions, so they are not re-prepared on every refresh
+        shapely.prepare(temp_gdf.geometry.to_numpy())
         boundaries_gdf = temp_gdf
-        boundaries_spatial_index = boundaries_gdf.sindex
+        # representative_point() is guaranteed to lie inside the polygon, unlike the centroid
+        constituency_points = {
+            str(name).lower(): (point.y, point.x)
+            for name, point in zip(boundaries_gdf[CONSTITUENCY_COLUMN_NAME], boundaries_gdf.geometry.representative_point())
+        }
         log.info(f"Successfully loaded and indexed {len(boundaries_gdf)} electoral boundaries.")
         return True
 
     except Exception as e:
         log.error(f"Failed to load or process electoral boundaries file: {e}", exc_info=True)
         boundaries_gdf = None
-        boundaries_spatial_index = None
+        constituency_points = {}
         return False
 
 BOUNDARIES_LOADED_SUCCESSFULLY = load_electoral_boundaries()
 
-# --- Location Extraction (Keep as is) ---
-def extract_locations_from_text(text: str, known_locations: List[str]) -> Set[str]:
-    # ... (Keep existing function) ...
-    found_locations = set()
-    for loc in known_locations:
-        pattern = r'(?i)(?<!\w)' + re.escape(loc) + r'(?!\w)'
-        if re.search(pattern, text):
-            found_locations.add(loc)
+# --- Location Extraction (single alternation regex instead of one search per location) ---
+# Compiled once at import. SINGAPORE_LOCATIONS is ordered longest-first, so e.g. "Bishan-Toa Payoh" wins over "Bishan"
+LOCATION_RE = re.compile(r'(?i)(?<!\w)(' + '|'.join(re.escape(loc) for loc in SINGAPORE_LOCATIONS) + r')(?!\w)')
+LOCATION_CANONICAL_NAMES = {loc.lower(): loc for loc in SINGAPORE_LOCATIONS}
+
+def extract_locations_from_text(text: str) -> List[str]:
+    """Returns the known locations mentioned in text, without duplicates, ordered by first mention."""
+    found_locations = list(dict.fromkeys(LOCATION_CANONICAL_NAMES[match.lower()] for match in LOCATION_RE.findall(text)))
     if found_locations:
          log.debug(f"Found potential locations in text: {found_locations}")
     return found_locations
 
 
-# --- Geocoding (Keep as is) ---
-def get_geocoder() -> Nominatim:
-    # ... (Keep existing function) ...
-    return Nominatim(user_agent=GEOCODER_USER_AGENT)
-
-def geocode_location(location_name: str, geolocator: Nominatim, attempt=1, max_attempts=3) -> Optional[Tuple[float, float]]:
-    # ... (Keep existing function) ...
-    cache_key = location_name.lower()
-    if cache_key in GEOCODING_CACHE:
-        log.debug(f"Cache hit for geocoding: {location_name}")
-        return GEOCODING_CACHE[cache_key]
-
-    query = f"{location_name}, Singapore"
-    log.debug(f"Geocoding query: '{query}' (Attempt {attempt})")
-    try:
-        time.sleep(1) # Respect Nominatim usage policy
-        location_data = geolocator.geocode(query, exactly_one=True, timeout=10)
-        if location_data:
-            coords = (location_data.latitude, location_data.longitude)
-            GEOCODING_CACHE[cache_key] = coords
+# --- Geocoding ---
+_CACHE_MISS = object()
+
+# Nominatim's rate limit is enforced across all callers (including concurrent refreshes) rather than per call
+_rate_limit_lock = threading.Lock()
+_next_geocode_slot = 0.0
+
+def _reserve_geocode_slot() -> float:
+    """Reserves the next free request slot and returns how long to wait before using it."""
+    global _next_geocode_slot
+    with _rate_limit_lock:
+        now = time.monotonic()
+        slot = max(now, _next_geocode_slot)
+        _next_geocode_slot = slot + GEOCODER_REQUEST_INTERVAL
+        return slot - now
+
+# --- Batch Geocoding (async, rate limited globally rather than per call) ---
+_RATE_LIMITED = object() # _geocode_one result: still rate limited after every retry, so don't cache a failure
+
+async def _geocode_one(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                       location_name: str, max_attempts=3):
+    """Returns (lat, lon), None if the location could not be geocoded, or _RATE_LIMITED."""
+    params = {'q': f"{location_name}, Singapore", 'format': 'jsonv2', 'limit': 1}
+    rate_limited = False
+    for attempt in range(1, max_attempts + 1):
+        async with semaphore:
+            await asyncio.sleep(_reserve_geocode_slot())
+            log.debug(f"Geocoding query: '{params['q']}' (Attempt {attempt})")
+            try:
+                async with session.get(NOMINATIM_SEARCH_URL, params=params) as response:
+                    rate_limited = response.status == 429
+                    if rate_limited:
+                        if attempt == max_attempts:
+                            break # No retry left, so don't wait
+                        # Back off while still holding the semaphore so no other lookup hits the limit meanwhile;
+                        # capped because this blocks the single refresh worker
+                        retry_after = response.headers.get('Retry-After', '')
+                        delay = int(retry_after) if retry_after.isdigit() else GEOCODER_REQUEST_INTERVAL * 2 ** attempt
+                        delay = min(delay, GEOCODER_MAX_BACKOFF_SECONDS)
+                        log.warning(f"Geocoder rate limited (429) for: {location_name}. Retrying in {delay}s...")
+                        await asyncio.sleep(delay)
+                        continue
+                    response.raise_for_status()
+                    results = await response.json()
+                coords = (float(results[0]['lat']), float(results[0]['lon'])) if results else None
+            except asyncio.TimeoutError:
+                log.warning(f"Geocoder timed out for: {location_name}. Retrying if possible...")
+                continue
+            except aiohttp.ClientError as e:
+                log.error(f"Geocoder service error for {location_name}: {e}")
+                return None
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                # Malformed payload: fail this location only instead of aborting the whole gather()
+                log.error(f"Unexpected geocoder response for {location_name}: {e!r}")
+                return None
+        if coords:
             log.debug(f"Geocoded '{location_name}' to {coords}")
-            return coords
         else:
             log.warning(f"Could not geocode location: {location_name}")
-            GEOCODING_CACHE[cache_key] = None
-            return None
-    except GeocoderTimedOut:
-        log.warning(f"Geocoder timed out for: {location_name}. Retrying if possible...")
-        if attempt < max_attempts:
-            time.sleep(attempt * 2)
-            return geocode_location(location_name, geolocator, attempt + 1, max_attempts)
-        else:
-            log.error(f"Geocoder timed out after {max_attempts} attempts for: {location_name}")
-            GEOCODING_CACHE[cache_key] = None; return None
-    except GeocoderServiceError as e:
-        log.error(f"Geocoder service error for {location_name}: {e}"); GEOCODING_CACHE[cache_key] = None; return None
-    except Exception as e:
-        log.error(f"Unexpected error during geocoding for {location_name}: {e}"); GEOCODING_CACHE[cache_key] = None; return None
-
-
-# --- Constituency Mapping Function (Keep as is) ---
-def find_constituency_for_point(lat, lon):
-    # ... (Keep existing function) ...
-    if not BOUNDARIES_LOADED_SUCCESSFULLY or boundaries_gdf is None or boundaries_spatial_index is None:
+        return coords
+    if rate_limited:
+        log.error(f"Geocoder still rate limited after {max_attempts} attempts for: {location_name}")
+        return _RATE_LIMITED
+    log.error(f"Geocoder timed out after {max_attempts} attempts for: {location_name}")
+    return None
+
+async def geocode_many(locations: Set[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """
+    Geocodes every location not already in GEOCODING_CACHE concurrently and stores the
+    results in the cache. Returns a mapping of location name -> coords (or None).
+    """
+    results = {}
+    for loc in locations:
+        cached = GEOCODING_CACHE.get(loc.lower(), _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            results[loc] = cached
+    pending = sorted(loc for loc in locations if loc not in results)
+    if not pending:
+        return results
+
+    log.info(f"Geocoding {len(pending)} uncached locations ({len(results)} cache hits)...")
+    semaphore = asyncio.Semaphore(GEOCODER_MAX_CONCURRENCY)
+    headers = {'User-Agent': GEOCODER_USER_AGENT}
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+        coords_list = await asyncio.gather(*[_geocode_one(session, semaphore, loc) for loc in pending])
+
+    for loc, coords in zip(pending, coords_list):
+        if coords is _RATE_LIMITED:
+            results[loc] = None # Not cached, so the next refresh tries again
+            continue
+        store_geocode_result(loc.lower(), coords)
+        results[loc] = coords
+    return results
+
+
+# --- Constituency Mapping ---
+def find_constituencies_for_points(points: List[Tuple[float, float]]) -> List[Optional[str]]:
+    """Finds the constituency for every (lat, lon) point with one spatial join; None where no boundary contains it."""
+    if not points:
+        return []
+    if not BOUNDARIES_LOADED_SUCCESSFULLY or boundaries_gdf is None:
         log.debug("Boundaries not loaded, skipping constituency check.")
-        return None
+        return [None] * len(points)
     try:
-        point = Point(lon, lat) # Shapely uses (lon, lat) order
-        possible_matches_index = list(boundaries_spatial_index.intersection(point.bounds))
-        if not possible_matches_index:
-            log.debug(f"No candidate boundaries found via spatial index for point ({lat}, {lon})")
-            return None
-        possible_matches = boundaries_gdf.iloc[possible_matches_index]
-        precise_matches = possible_matches[possible_matches.geometry.contains(point)]
-        if not precise_matches.empty:
-            constituency_name = precise_matches.iloc[0][CONSTITUENCY_COLUMN_NAME]
-            log.debug(f"Point ({lat}, {lon}) is in constituency: {constituency_name}")
-            return constituency_name
-        else:
-            log.debug(f"Point ({lat}, {lon}) is not within any candidate boundary geometry.")
-            return None
+        lats, lons = zip(*points)
+        points_gdf = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lons, lats), crs='EPSG:4326')
+        # The column subset shares the same (prepared) geometry objects and keeps e.g. the KML description out of the result
+        joined = gpd.sjoin(points_gdf, boundaries_gdf[[CONSTITUENCY_COLUMN_NAME, 'geometry']], how='left', predicate='within')
+        # A point on a shared border can fall within two polygons; keep the first match per point
+        joined = joined[~joined.index.duplicated(keep='first')].reindex(points_gdf.index)
+        return [name if isinstance(name, str) else None for name in joined[CONSTITUENCY_COLUMN_NAME]]
     except Exception as e:
-        log.error(f"Error during point-in-polygon check for ({lat}, {lon}): {e}", exc_info=True)
-        return None
+        log.error(f"Error during batch point-in-polygon check for {len(points)} points: {e}", exc_info=True)
+        return [None] * len(points)
 
 
 # --- Article Processing and Grouping (MODIFIED to group by COORDS, enrich with constituency) ---
@@ -159,38 +239,35 @@ def process_and_group_articles(articles: List[Dict]) -> List[Dict]: # Return LIS
     Processes articles to find locations, geocode them, determine constituency (if possible),
     and group them by COORDINATES. Adds constituency info to the cluster.
     """
-    geolocator = get_geocoder()
     articles_with_location = []
 
     log.info(f"Processing {len(articles)} articles for location and constituency enrichment...")
 
-    # 1. Find locations, geocode, and store relevant data
-    for article in articles:
-        text_to_scan = f"{article['title']} {article['summary']}"
-        found_locations = extract_locations_from_text(text_to_scan, SINGAPORE_LOCATIONS)
+    # 1. Find locations in each article (one scan per article)
+    article_locations = [
+        (article, extract_locations_from_text(f"{article['title']} {article['summary']}"))
+        for article in articles
+    ]
+
+    # 2. Geocode the union of all found locations once; constituency names map straight to a point inside them
+    all_locations = set().union(*(locs for _, locs in article_locations))
+    constituency_coords = {loc: constituency_points[loc.lower()] for loc in all_locations if loc.lower() in constituency_points}
+    locations_to_geocode = all_locations - constituency_coords.keys()
+    coords_map = asyncio.run(geocode_many(locations_to_geocode)) if locations_to_geocode else {}
+    coords_map.update(constituency_coords)
+
+    # 3. Attach coordinates using in-memory lookups only
+    for article, found_locations in article_locations:
         log.debug(f"Scanning article '{article['title'][:30]}...'. Found locations: {found_locations}")
+        # Use the first-mentioned location that geocoded (deterministic, unlike set iteration order)
+        primary_location_name = next((loc for loc in found_locations if coords_map.get(loc)), None)
 
-        coords = None
-        primary_location_name = None
-
-        if found_locations:
-            for loc in found_locations:
-                log.debug(f"Attempting to geocode location: {loc}")
-                coords_result = geocode_location(loc, geolocator)
-                if coords_result:
-                    log.debug(f"Geocoding SUCCESS for {loc}: {coords_result}")
-                    coords = coords_result
-                    primary_location_name = loc
-                    break # Use first successfully geocoded location
-                else:
-                    log.debug(f"Geocoding FAILED for {loc}")
-
-        if coords:
+        if primary_location_name:
             # Add article with coordinate and location name
              articles_with_location.append({
                  **article,
                  'location_name': primary_location_name,
-                 'coords': coords
+                 'coords': coords_map[primary_location_name]
              })
         # else: # Optionally keep track of articles without coordinates
         #     log.debug(f"Article '{article['title'][:30]}...' could not be geocoded.")
@@ -198,26 +275,26 @@ def process_and_group_articles(articles: List[Dict]) -> List[Dict]: # Return LIS
 
     log.info(f"Successfully geocoded {len(articles_with_location)} articles.")
 
-    # 2. Group articles by coordinates (using rounded string key)
+    # 4. Group articles by coordinates (using rounded tuple key)
     grouped_by_coords = {}
     for article in articles_with_location:
         lat, lon = article['coords']
-        # Use rounded coordinates as grouping key
-        coord_key = f"{lat:.5f},{lon:.5f}"
+        # Use rounded coordinates as grouping key (cheaper to build and hash than a formatted string)
+        coord_key = (round(lat, 5), round(lon, 5))
 
         if coord_key not in grouped_by_coords:
-            # --- Find constituency for this coordinate cluster (only needs to be done once per cluster) ---
-            constituency = find_constituency_for_point(lat, lon)
             grouped_by_coords[coord_key] = {
                 'latitude': lat,
                 'longitude': lon,
                 'location_name': article['location_name'], # Use name from first article in group
-                'constituency': constituency, # Store constituency found for this coord
-                'articles': []
+                'constituency': None, # Filled in below with one batched lookup for all clusters
+                'articles': [],
+                'seen_urls': set() # O(1) duplicate check; not included in the output
             }
 
         # Add article if not already present (basic URL check)
-        if not any(a['url'] == article['url'] for a in grouped_by_coords[coord_key]['articles']):
+        if article['url'] not in grouped_by_coords[coord_key]['seen_urls']:
+             grouped_by_coords[coord_key]['seen_urls'].add(article['url'])
              grouped_by_coords[coord_key]['articles'].append({
                  'title': article['title'],
                  'url': article['url'],
@@ -226,7 +303,13 @@ def process_and_group_articles(articles: List[Dict]) -> List[Dict]: # Return LIS
                  # Optionally add 'published_date' if available
              })
 
-    # 3. Format the output list of clusters
+    # 5. Find the constituency for every coordinate cluster in one spatial join
+    cluster_data = list(grouped_by_coords.values())
+    constituencies = find_constituencies_for_points([(data['latitude'], data['longitude']) for data in cluster_data])
+    for data, constituency in zip(cluster_data, constituencies):
+        data['constituency'] = constituency
+
+    # 6. Format the output list of clusters
     clusters = []
     for data in grouped_by_coords.values():
         clusters.append({
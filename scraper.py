@@ -1,7 +1,10 @@
 # scraper.py
 
 import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import asyncio
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import html as lxml_html
 import feedparser
 import logging
 from typing import List, Dict, Optional
@@ -16,22 +19,62 @@ try:
     from config import SINGAPORE_LOCATIONS
 except ImportError:
     # Define a minimal fallback list if config import fails (optional)
-    SINGAPORE_LOCATIONS = ['Singapore']
+    SINGAPORE_LOCATIONS = ('Singapore',)
     logging.warning("Could not import SINGAPORE_LOCATIONS from config. Using fallback list.")
 
-# --- HTML Scraping Helper Functions (Keep as is) ---
-def fetch_html(url: str) -> Optional[str]:
-    # ... (no changes needed here) ...
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        return response.text
-    except requests.exceptions.RequestException as e:
-        log.error(f"Error fetching HTML URL {url}: {e}")
+# One alternation regex for the keyword filter instead of a search per location, compiled once at import
+# (config keeps SINGAPORE_LOCATIONS longest-first, so longer names win over their prefixes)
+_KEYWORD_RE = re.compile(r'(?i)\b(?:' + '|'.join(re.escape(loc) for loc in SINGAPORE_LOCATIONS) + r')\b')
+
+# Fallback tag stripper for summaries lxml cannot parse
+_TAG_RE = re.compile(r'<[^<]+?>')
+
+# --- HTTP Fetch Helper Functions ---
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+# Connection pool shared by every fetch in a scrape (keep-alive, cached DNS)
+POOL_LIMIT = 10
+POOL_LIMIT_PER_HOST = 4
+DNS_CACHE_TTL_SECONDS = 300
+# Retry transient failures (connection errors, timeouts, 5xx) with exponential backoff
+FETCH_RETRIES = 2
+FETCH_BACKOFF_FACTOR = 0.3
+
+async def _fetch(session: aiohttp.ClientSession, url: str, as_text: bool):
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                # text() honours the response charset
+                return await (response.text(errors='replace') if as_text else response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status >= 500
+            if not retryable or attempt == FETCH_RETRIES:
+                log.error(f"Error fetching URL {url}: {e}")
+                return None
+            log.warning(f"Error fetching URL {url}: {e}. Retrying...")
+            await asyncio.sleep(FETCH_BACKOFF_FACTOR * (2 ** attempt))
+
+async def fetch_content(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+    """Fetches the raw response body for a URL using the shared session."""
+    return await _fetch(session, url, as_text=False)
+
+async def fetch_html(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+    return await _fetch(session, url, as_text=True)
+
+_LEADING_TAG_RE = re.compile(r'^([a-zA-Z][\w-]*)(?=[.#\[]|$)')
+
+def _container_strainer(container_selector: str) -> Optional[SoupStrainer]:
+    """
+    Returns a SoupStrainer limiting parsing to the container's tag, or None when the selector
+    depends on ancestors/siblings (combinators, pseudo-classes) or has no leading tag name.
+    """
+    selector = container_selector.strip()
+    if any(char in selector for char in ' >+~,:'):
         return None
+    match = _LEADING_TAG_RE.match(selector)
+    return SoupStrainer(match.group(1)) if match else None
 
 def parse_articles_from_html(html_content: str, config: Dict) -> List[Dict]:
     # ... (no changes needed here, but ensure it's only called for HTML type) ...
@@ -39,8 +82,9 @@ def parse_articles_from_html(html_content: str, config: Dict) -> List[Dict]:
     if not html_content:
         return articles
     try:
-        soup = BeautifulSoup(html_content, 'html.parser') # Keep html.parser for actual HTML pages
         selectors = config['selectors'] # This line causes error if called for RSS
+        # lxml is much faster than html.parser; the strainer skips building the rest of the page
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=_container_strainer(selectors['article_container']))
         base_url = config.get('base_url', config['url'])
         article_elements = soup.select(selectors['article_container'])
         log.info(f"Found {len(article_elements)} potential HTML article elements using selector '{selectors['article_container']}' for {config['name']}")
@@ -63,16 +107,29 @@ def parse_articles_from_html(html_content: str, config: Dict) -> List[Dict]:
     return articles
 
 
-# --- RSS Parsing Helper Function (MODIFIED for better summary parsing) ---
-def parse_rss_feed(feed_url: str, source_name: str) -> List[Dict]:
-    """Parses articles from an RSS feed URL, filtering by keywords."""
+# --- RSS Parsing Helper Functions (MODIFIED for better summary parsing) ---
+def _strip_html(summary_html: str) -> str:
+    """Returns the whitespace-normalised text of an HTML summary."""
+    if not summary_html:
+        return ""
+    try:
+        # Plain lxml is enough to pull the text out of a short summary fragment. Text nodes are joined with a
+        # space (like get_text(separator=' ')) so e.g. "<font>CNA</font></li><li><a>Bedok" stays "CNA Bedok"
+        return ' '.join(' '.join(lxml_html.fromstring(summary_html).itertext()).split())
+    except Exception as parse_err:
+        log.warning(f"Could not parse summary HTML using lxml: {parse_err}. Using raw summary.")
+        return _TAG_RE.sub('', summary_html).strip()
+
+def parse_rss_feed(feed_content: bytes, source_name: str) -> List[Dict]:
+    """Parses articles from already-fetched RSS feed content, filtering by keywords."""
     articles = []
+    kept_entries = [] # (title, link, summary_html, published_date) of entries passing the filter
     filtered_out_count = 0
-    log.info(f"Fetching and parsing RSS feed: {feed_url}")
+    log.info(f"Parsing RSS feed for {source_name}")
     try:
-        feed_data = feedparser.parse(feed_url)
+        feed_data = feedparser.parse(feed_content)
         if feed_data.bozo:
-            log.warning(f"Feedparser reported potential issues (bozo=1) for {feed_url}. Error: {feed_data.get('bozo_exception', 'Unknown')}")
+            log.warning(f"Feedparser reported potential issues (bozo=1) for {source_name}. Error: {feed_data.get('bozo_exception', 'Unknown')}")
 
         log.info(f"Found {len(feed_data.entries)} total entries in RSS feed for {source_name}. Filtering...")
 
@@ -85,91 +142,87 @@ def parse_rss_feed(feed_url: str, source_name: str) -> List[Dict]:
 
             # --- Keyword Filtering Step ---
             text_to_check = f"{title} {summary_html}" # Check raw summary HTML too
-            found_keyword = False
-            # Use a simple check or reuse extract_locations_from_text logic
-            # Simple check for any location mention:
-            for loc in SINGAPORE_LOCATIONS:
-                 # Case-insensitive check, maybe add word boundaries if needed
-                 if re.search(r'(?i)\b' + re.escape(loc) + r'\b', text_to_check):
-                      found_keyword = True
-                      break # Found one keyword, no need to check others
-
-            if not found_keyword:
+            if not _KEYWORD_RE.search(text_to_check):
                 filtered_out_count += 1
                 log.debug(f"Filtering out RSS entry (no SG keywords): '{title[:50]}...'")
                 continue # Skip this entry if no keywords found
             # --- End Keyword Filtering ---
 
-
-            # --- Proceed if keywords were found ---
-            cleaned_summary = ""
-            if summary_html:
-                try:
-                    summary_soup = BeautifulSoup(summary_html, 'lxml')
-                    cleaned_summary = summary_soup.get_text(strip=True, separator=' ')
-                except Exception as parse_err:
-                    log.warning(f"Could not parse summary HTML for entry '{title}' using lxml: {parse_err}. Using raw summary.")
-                    cleaned_summary = re.sub('<[^<]+?>', '', summary_html).strip()
-
             if title and link:
-                articles.append({
-                    'title': title.strip(),
-                    'url': link.strip(),
-                    'summary': cleaned_summary,
-                    'source': source_name,
-                    'published_date': published_date
-                })
-            # else: # No need for this log if we filter above
-            #    log.warning(f"Skipping RSS entry, missing title or link. Entry: {entry.get('id', 'N/A')}")
+                kept_entries.append((title, link, summary_html, published_date))
+
+        # --- Clean summaries of the kept entries only (inline: ~30 us each, far below process start-up cost) ---
+        for title, link, summary_html, published_date in kept_entries:
+            cleaned_summary = _strip_html(summary_html)
+            articles.append({
+                'title': title.strip(),
+                'url': link.strip(),
+                'summary': cleaned_summary,
+                'source': source_name,
+                'published_date': published_date
+            })
 
     except Exception as e:
-        log.error(f"Error parsing RSS feed {feed_url} for {source_name}: {e}", exc_info=True)
+        log.error(f"Error parsing RSS feed for {source_name}: {e}", exc_info=True)
 
     log.info(f"Finished parsing RSS for {source_name}. Kept {len(articles)} articles, filtered out {filtered_out_count}.")
     return articles
 
 
 
-# --- Main Scraping Function (VERIFY LOGIC) ---
-def scrape_news_sources(sources_config: List[Dict]) -> List[Dict]:
-    """Scrapes news articles from a list of configured sources (HTML or RSS)."""
-    all_articles = []
-    log.info(f"Starting scraping process for {len(sources_config)} sources...")
+# --- Main Scraping Functions (async fetch, parsing offloaded to executor) ---
+async def fetch_one(session: aiohttp.ClientSession, source: Dict) -> List[Dict]:
+    """Fetches and parses a single configured source (HTML or RSS)."""
+    # --- Defensive check for source validity ---
+    if not isinstance(source, dict) or 'name' not in source or 'url' not in source:
+         log.warning(f"Skipping invalid source configuration: {source}")
+         return []
 
-    for source in sources_config:
-        # --- Defensive check for source validity ---
-        if not isinstance(source, dict) or 'name' not in source or 'url' not in source:
-             log.warning(f"Skipping invalid source configuration: {source}")
-             continue
-
-        source_name = source['name']
-        source_type = source.get('type', 'html').lower() # Default to html if type not specified
-        source_url = source['url']
-        parsed_articles = [] # Initialize for this source
-
-        log.info(f"Processing source: {source_name} ({source_type.upper()}) - {source_url}")
-
-        # --- Ensure correct branching based on type ---
-        if source_type == 'rss':
-            parsed_articles = parse_rss_feed(source_url, source_name)
-        elif source_type == 'html':
-            # Check if selectors are provided for HTML type
-            if 'selectors' not in source:
-                 log.error(f"Source '{source_name}' is type 'html' but missing 'selectors' in config.py. Skipping.")
-                 continue # Skip this source if selectors are missing
-
-            html = fetch_html(source_url)
-            if html:
-                # This should ONLY be called if type is 'html' AND selectors exist
-                parsed_articles = parse_articles_from_html(html, source)
-            else:
-                log.warning(f"Could not fetch HTML content for {source_name}")
-        else:
-            log.warning(f"Unsupported source type '{source_type}' for {source_name}. Skipping.")
+    source_name = source['name']
+    source_type = source.get('type', 'html').lower() # Default to html if type not specified
+    source_url = source['url']
+    parsed_articles = [] # Initialize for this source
+    loop = asyncio.get_running_loop()
+
+    log.info(f"Processing source: {source_name} ({source_type.upper()}) - {source_url}")
 
-        # --- Log results for this specific source ---
-        log.info(f"Parsed {len(parsed_articles)} articles from {source_name}")
-        all_articles.extend(parsed_articles)
+    # --- Ensure correct branching based on type ---
+    if source_type == 'rss':
+        feed_content = await fetch_content(session, source_url)
+        if feed_content is not None:
+            parsed_articles = await loop.run_in_executor(None, parse_rss_feed, feed_content, source_name)
+        else:
+            log.warning(f"Could not fetch RSS feed for {source_name}")
+    elif source_type == 'html':
+        # Check if selectors are provided for HTML type
+        if 'selectors' not in source:
+             log.error(f"Source '{source_name}' is type 'html' but missing 'selectors' in config.py. Skipping.")
+             return [] # Skip this source if selectors are missing
+
+        html = await fetch_html(session, source_url)
+        if html:
+            # This should ONLY be called if type is 'html' AND selectors exist
+            parsed_articles = await loop.run_in_executor(None, parse_articles_from_html, html, source)
+        else:
+            log.warning(f"Could not fetch HTML content for {source_name}")
+    else:
+        log.warning(f"Unsupported source type '{source_type}' for {source_name}. Skipping.")
+
+    # --- Log results for this specific source ---
+    log.info(f"Parsed {len(parsed_articles)} articles from {source_name}")
+    return parsed_articles
+
+async def fetch_all(sources_config: List[Dict]) -> List[Dict]:
+    """Fetches all sources concurrently over one pooled session, preserving config order."""
+    connector = aiohttp.TCPConnector(limit=POOL_LIMIT, limit_per_host=POOL_LIMIT_PER_HOST, ttl_dns_cache=DNS_CACHE_TTL_SECONDS)
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with aiohttp.ClientSession(connector=connector, headers=REQUEST_HEADERS, timeout=timeout) as session:
+        results = await asyncio.gather(*[fetch_one(session, source) for source in sources_config])
+    return [article for parsed_articles in results for article in parsed_articles]
 
+def scrape_news_sources(sources_config: List[Dict]) -> List[Dict]:
+    """Scrapes news articles from a list of configured sources (HTML or RSS)."""
+    log.info(f"Starting scraping process for {len(sources_config)} sources...")
+    all_articles = asyncio.run(fetch_all(sources_config))
     log.info(f"Scraping finished. Total articles collected: {len(all_articles)}")
-    return all_articles
\ No newline at end of file
+    return all_articles
@@ -2,25 +2,37 @@ import streamlit as st
 import pandas as pd
 import logging
 import time
+import hashlib
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Tuple, Set
 
 # Geospatial and Mapping
 import geopandas as gpd
-from shapely.geometry import Point
+import shapely
 import folium
 # Import GeoJsonTooltip for hover info on boundaries
 from folium.features import GeoJsonTooltip
+from folium.plugins import FastMarkerCluster
 from streamlit_folium import st_folium
 
 # Web/Parsing
-import feedparser
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from geopy.adapters import RequestsAdapter
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 
+# Multi-pattern location matching (optional; falls back to one combined regex)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Import config
 try:
     import config
@@ -38,6 +50,21 @@ SINGAPORE_LOCATIONS = config.SINGAPORE_LOCATIONS
 ELECTORAL_BOUNDARIES_FILE = config.ELECTORAL_BOUNDARIES_FILE
 CONSTITUENCY_COLUMN_NAME = config.CONSTITUENCY_COLUMN_NAME
 GEOCODER_USER_AGENT = config.GEOCODER_USER_AGENT
+SINGAPORE_LOCATION_COORDS = config.SINGAPORE_LOCATION_COORDS
+if not SINGAPORE_LOCATION_COORDS:
+    log.warning(f"No pre-geocoded location table at {config.LOCATION_COORDS_FILE}; run build_location_coords.py to avoid live geocoding.")
+
+# Keep-alive connection pool sizes (pool_maxsize covers the 16 feed-fetching threads)
+HTTP_POOL_CONNECTIONS = 8
+HTTP_POOL_MAXSIZE = 16
+
+# News data is cached per feed-change token; feeds that send no ETag/Last-Modified fall back to a time bucket
+NEWS_CACHE_TTL = "6h"
+FEED_PROBE_FALLBACK_SECONDS = 30 * 60
+FEED_PROBE_TTL = 60 # Seconds a probe result is reused, so page loads don't each wait on HEAD requests
+
+# Clusters are keyed by coordinates quantized to 5 decimal places (~1 m) as integers
+COORD_KEY_SCALE = 100_000
 
 # --- Caching Functions ---
 @st.cache_resource
@@ -46,7 +73,7 @@ def load_boundaries_data(file_path):
     if not os.path.exists(file_path):
         log.error(f"Electoral boundaries file not found at: {file_path}")
         st.error(f"Error: Boundary file not found at {file_path}. Cannot map constituencies.")
-        return None, None
+        return None
     log.info(f"Loading electoral boundaries from: {file_path}")
     try:
         driver = 'KML' if file_path.lower().endswith(('.kml', '.kmz')) else None
@@ -54,119 +81,241 @@ def load_boundaries_data(file_path):
         if CONSTITUENCY_COLUMN_NAME not in gdf.columns:
             log.error(f"Constituency column '{CONSTITUENCY_COLUMN_NAME}' not found in boundary file.")
             st.error(f"Config Error: Column '{CONSTITUENCY_COLUMN_NAME}' not in boundary file. Available: {list(gdf.columns)}")
-            return None, None
+            return None
         if gdf.crs is None:
             log.warning("Boundary file CRS not defined. Assuming EPSG:4326.")
             gdf.set_crs(epsg=4326, inplace=True)
         elif gdf.crs.to_epsg() != 4326:
             log.info(f"Converting boundaries CRS from {gdf.crs} to EPSG:4326")
             gdf = gdf.to_crs(epsg=4326)
-        spatial_index = gdf.sindex
-        log.info(f"Successfully loaded and indexed {len(gdf)} electoral boundaries.")
-        return gdf, spatial_index # Return both gdf and index
+        # Simplify in degrees: ~11 m is well below what constituency lookups need, and both the PIP tests and the
+        # GeoJSON layer get far fewer vertices. Projecting to EPSG:3414 would not change the containment results
+        gdf['geometry'] = gdf.geometry.simplify(config.BOUNDARY_SIMPLIFY_TOLERANCE, preserve_topology=True)
+        # Prepare the polygons once (in place). fetch_and_process_news queries them as the *input* geometries of an
+        # STRtree 'contains' query, which is the side shapely uses prepared geometries for
+        shapely.prepare(gdf.geometry.to_numpy())
+        log.info(f"Successfully loaded and prepared {len(gdf)} electoral boundaries.")
+        return gdf
     except ImportError:
         log.error("Geopandas/Shapely not installed correctly.")
         st.error("Geospatial libraries not found. Please check installation.")
-        return None, None
+        return None
     except Exception as e:
         log.error(f"Failed to load or process boundaries file: {e}", exc_info=True)
         st.error(f"Error loading boundary file: {e}")
-        return None, None
+        return None
 
 @st.cache_resource
 def get_geocoder_instance():
     # ... (Keep this function as is) ...
     log.info("Initializing geocoder...")
-    return Nominatim(user_agent=GEOCODER_USER_AGENT)
+    # geopy keeps one pooled requests session per geocoder; this instance is cached, so it is reused across runs
+    adapter_factory = lambda proxies, ssl_context: RequestsAdapter(
+        proxies=proxies, ssl_context=ssl_context, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE
+    )
+    return Nominatim(user_agent=GEOCODER_USER_AGENT, adapter_factory=adapter_factory)
+
+@st.cache_resource
+def get_location_automaton():
+    # One automaton over all lower-cased location names, built once per process
+    automaton = ahocorasick.Automaton()
+    for loc in SINGAPORE_LOCATIONS:
+        automaton.add_word(loc.lower(), loc)
+    automaton.make_automaton()
+    return automaton
+
+# Fallback matcher: one alternation over all locations (SINGAPORE_LOCATIONS is ordered longest-first,
+# so longer names win over their prefixes) and a lookup back to the canonical spelling
+LOC_RE = re.compile(r'\b(' + '|'.join(re.escape(loc) for loc in SINGAPORE_LOCATIONS) + r')\b', re.IGNORECASE)
+LOC_LOOKUP = {loc.lower(): loc for loc in SINGAPORE_LOCATIONS}
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
 
-@st.cache_data(ttl="30m")
-def fetch_and_process_news(_news_sources_config: List[Dict]):
-    # ... (Keep this function exactly as is - it uses load_boundaries_data) ...
+def find_locations(text: str, automaton=None) -> List[str]:
+    """
+    Returns the known locations mentioned in text as whole words (case-insensitive), in one pass,
+    ordered by first mention. Uses the Aho-Corasick automaton when given, else LOC_RE; both return
+    the same non-overlapping leftmost-longest matches (so "Bishan-Toa Payoh" does not also yield "Bishan").
+    """
+    if automaton is None:
+        return list(dict.fromkeys(LOC_LOOKUP[match.lower()] for match in LOC_RE.findall(text)))
+    lowered = text.lower()
+    matches = []
+    for end, loc in automaton.iter(lowered):
+        start = end - len(loc) + 1
+        # Keep the \b word-boundary semantics of the regex version
+        if (start == 0 or not _is_word_char(lowered[start - 1])) and (end + 1 == len(lowered) or not _is_word_char(lowered[end + 1])):
+            matches.append((start, -len(loc), loc))
+    found, last_end = [], 0
+    for start, neg_len, loc in sorted(matches):
+        if start >= last_end: found.append(loc); last_end = start - neg_len # Skip hits inside an earlier, longer match
+    return list(dict.fromkeys(found))
+
+def resolve_location_coords(loc: str, geocoder) -> Optional[Tuple[float, float]]:
+    """
+    Static table first; the persistent cache and live geocoder only cover locations missing from it.
+    The cache is config.GEOCODING_CACHE, shared with the Flask backend (on disk when diskcache is installed).
+    """
+    cache_key = loc.lower()
+    coords = SINGAPORE_LOCATION_COORDS.get(cache_key)
+    if coords is not None or not config.GEOCODER_FALLBACK_ENABLED:
+        return coords
+    cache_miss = object()
+    coords = config.GEOCODING_CACHE.get(cache_key, cache_miss)
+    if coords is cache_miss:
+        try:
+            time.sleep(0.5); location_data = geocoder.geocode(f"{loc}, Singapore", exactly_one=True, timeout=10)
+            coords = (location_data.latitude, location_data.longitude) if location_data else None
+        except (GeocoderTimedOut, GeocoderServiceError, Exception) as e: log.warning(f"Geocoding error for '{loc}': {e}"); coords = None
+        config.store_geocode_result(cache_key, coords)
+    return coords
+
+@st.cache_resource
+def get_http_session():
+    # Shared keep-alive session so feed fetches reuse connections across sources and reruns
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+TAG_RE = re.compile(r'<[^<]+?>') # Fallback tag stripper
+
+def clean_summary_html(summary_html: str) -> str:
+    if not summary_html: return ""
+    # Join text nodes with a space so adjacent <li>/<font> items don't glue together ("CNABedok")
+    try: return ' '.join(' '.join(lxml_html.fragment_fromstring(summary_html, create_parent='div').itertext()).split())
+    except Exception: return TAG_RE.sub('', summary_html).strip()
+
+def fetch_rss_source(source: Dict, session: requests.Session, automaton=None) -> Optional[List[Dict]]:
+    """Fetches and filters one RSS source (runs in a worker thread). Returns None if it failed."""
+    source_name = source['name']
+    source_url = source['url']
+    parsed_articles = []
+    filtered_out_count = 0
+    log.info(f"Processing source: {source_name} (RSS)")
+    try:
+        response = session.get(source_url, timeout=15); response.raise_for_status()
+        # One C-level parse of the feed, reading RSS <item> elements directly. A parser per call since this
+        # runs in worker threads; recover=True keeps feedparser's tolerance of sloppy feeds
+        parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+        feed_root = etree.fromstring(response.content, parser=parser)
+        if feed_root is None: raise ValueError("Feed content is not parseable XML")
+        if parser.error_log: log.warning(f"XML parser recovered from errors in {source_url}: {parser.error_log.last_error}")
+        items = feed_root.findall('.//item')
+        log.info(f"Found {len(items)} total entries. Filtering...")
+        for item in items:
+            title = item.findtext('title', default='')
+            link = item.findtext('link')
+            summary_html = item.findtext('description', default='')
+            cleaned_summary = clean_summary_html(summary_html)
+            # The location hits double as the keyword filter and are reused in step 2 instead of re-scanning
+            hits = find_locations(f"{title} {cleaned_summary}", automaton)
+            if not hits: filtered_out_count += 1; continue
+            if title and link: parsed_articles.append({'title': title.strip(), 'url': link.strip(), 'summary': cleaned_summary, 'source': source_name, '_hits': hits})
+        log.info(f"Kept {len(parsed_articles)} articles from {source_name}, filtered out {filtered_out_count}.")
+        return parsed_articles
+    except Exception as e:
+        log.error(f"Error fetching/parsing RSS feed {source_url}: {e}", exc_info=True)
+        return None
+
+@st.cache_data(ttl=FEED_PROBE_TTL, show_spinner=False)
+def probe_feed_token(news_sources: List[Dict]) -> str:
+    """
+    Cheap "is anything new" check: HEAD every RSS feed and hash their ETag/Last-Modified validators.
+    Feeds without validators (or failed probes) contribute the current time bucket instead.
+    """
+    rss_sources = [source for source in news_sources if source.get('type', 'html').lower() == 'rss']
+    if not rss_sources: return ''
+    session = get_http_session()
+    time_bucket = f"t{int(time.time() // FEED_PROBE_FALLBACK_SECONDS)}"
+    def probe(source: Dict) -> str:
+        try:
+            response = session.head(source['url'], timeout=5, allow_redirects=True)
+            if not 200 <= response.status_code < 300: return time_bucket # An error page's validators say nothing about the feed
+            return response.headers.get('ETag') or response.headers.get('Last-Modified') or time_bucket
+        except requests.RequestException as e: log.warning(f"Feed probe failed for {source['name']}: {e}"); return time_bucket
+    with ThreadPoolExecutor(max_workers=min(16, len(rss_sources))) as executor:
+        validators = list(executor.map(probe, rss_sources))
+    return hashlib.md5('|'.join(validators).encode()).hexdigest()
+
+@st.cache_data(ttl=NEWS_CACHE_TTL)
+def fetch_and_process_news(_news_sources_config: List[Dict], _boundaries_gdf, etag_token: str):
+    # Boundary data is passed in from the script body (already loaded via cache_resource);
+    # the leading underscores stop Streamlit from hashing these arguments. etag_token is hashed,
+    # so the pipeline re-runs only when a feed reports new content (see probe_feed_token)
     log.info("Fetching and processing news data...")
     all_articles = []
     geocoder = get_geocoder_instance()
-    # Make sure boundary data is loaded here for constituency mapping
-    boundaries_gdf, boundaries_spatial_index = load_boundaries_data(ELECTORAL_BOUNDARIES_FILE)
 
-    # --- 1. Fetch Articles ---
+    # --- 1. Fetch Articles (network-bound, so all feeds are fetched concurrently) ---
+    rss_sources = []
     for source in _news_sources_config:
-        source_name = source['name']
         source_type = source.get('type', 'html').lower()
-        source_url = source['url']
-        parsed_articles = []
-        filtered_out_count = 0
-        log.info(f"Processing source: {source_name} ({source_type.upper()})")
-        if source_type == 'rss':
-            try:
-                feed_data = feedparser.parse(source_url)
-                if feed_data.bozo: log.warning(f"Feedparser issue for {source_url}: {feed_data.get('bozo_exception')}")
-                log.info(f"Found {len(feed_data.entries)} total entries. Filtering...")
-                for entry in feed_data.entries:
-                    title = entry.get('title', '')
-                    link = entry.get('link')
-                    summary_html = entry.get('summary', entry.get('description', ''))
-                    text_to_check = f"{title} {summary_html}"
-                    found_keyword = any(re.search(r'(?i)\b' + re.escape(loc) + r'\b', text_to_check) for loc in SINGAPORE_LOCATIONS)
-                    if not found_keyword: filtered_out_count += 1; continue
-                    cleaned_summary = ""
-                    if summary_html:
-                        try:
-                            summary_soup = BeautifulSoup(summary_html, 'lxml')
-                            cleaned_summary = summary_soup.get_text(strip=True, separator=' ')
-                        except Exception: cleaned_summary = re.sub('<[^<]+?>', '', summary_html).strip()
-                    if title and link: parsed_articles.append({'title': title.strip(), 'url': link.strip(), 'summary': cleaned_summary, 'source': source_name})
-                log.info(f"Kept {len(parsed_articles)} articles from {source_name}, filtered out {filtered_out_count}.")
-                all_articles.extend(parsed_articles)
-            except Exception as e: log.error(f"Error parsing RSS feed {source_url}: {e}", exc_info=True); st.warning(f"Could not process RSS feed: {source_name}")
-        else: log.warning(f"Unsupported source type '{source_type}' for {source_name}.")
+        if source_type == 'rss': rss_sources.append(source)
+        else: log.warning(f"Unsupported source type '{source_type}' for {source['name']}.")
+    if rss_sources:
+        session = get_http_session()
+        automaton = get_location_automaton() if AHOCORASICK_AVAILABLE else None # Looked up once, not per article
+        rss_sources.sort(key=lambda source: urlparse(source['url']).netloc) # Same-host fetches share pooled connections
+        with ThreadPoolExecutor(max_workers=min(16, len(rss_sources))) as executor:
+            results = list(executor.map(lambda source: fetch_rss_source(source, session, automaton), rss_sources))
+        for source, parsed_articles in zip(rss_sources, results):
+            # st.* calls must stay on the script thread, so failures are reported here
+            if parsed_articles is None: st.warning(f"Could not process RSS feed: {source['name']}")
+            else: all_articles.extend(parsed_articles)
     log.info(f"Total articles after fetching & initial filtering: {len(all_articles)}")
 
     # --- 2. Process Articles (Geocode, Constituency Map) ---
-    articles_with_location = []
-    geocoding_cache = {}
-    for article in all_articles:
-        text_to_scan = f"{article['title']} {article['summary']}"
-        found_locations = set(loc for loc in SINGAPORE_LOCATIONS if re.search(r'(?i)\b' + re.escape(loc) + r'\b', text_to_scan))
-        if not found_locations: continue
-        coords = None; primary_location_name = None
+    cluster_columns = ['latitude', 'longitude', 'location_name', 'constituency', 'article_count', 'articles']
+    articles_df = pd.DataFrame(all_articles)
+    if articles_df.empty:
+        log.info("Grouped articles into 0 coordinate clusters.")
+        return pd.DataFrame(columns=cluster_columns)
+    # Each article's hits are tried in mention order and resolution stops at the first that geocodes, so later
+    # hits never cost a live lookup; each location is resolved at most once across articles
+    location_coords = {}
+    def first_resolvable(found_locations: List[str]) -> Optional[str]:
         for loc in found_locations:
-            cache_key = loc.lower()
-            if cache_key in geocoding_cache: coords_result = geocoding_cache[cache_key]
-            else:
-                try:
-                    time.sleep(0.5); location_data = geocoder.geocode(f"{loc}, Singapore", exactly_one=True, timeout=10)
-                    coords_result = (location_data.latitude, location_data.longitude) if location_data else None; geocoding_cache[cache_key] = coords_result
-                except (GeocoderTimedOut, GeocoderServiceError, Exception) as e: log.warning(f"Geocoding error for '{loc}': {e}"); coords_result = None; geocoding_cache[cache_key] = None
-            if coords_result: coords = coords_result; primary_location_name = loc; break
-        if coords: articles_with_location.append({**article, 'location_name': primary_location_name, 'coords': coords})
-    log.info(f"Successfully geocoded {len(articles_with_location)} articles.")
-
-    # --- 3. Group by Coordinates & Find Constituency ---
-    grouped_by_coords = {}
-    for article in articles_with_location:
-        lat, lon = article['coords']
-        coord_key = f"{lat:.5f},{lon:.5f}"
-        if coord_key not in grouped_by_coords:
-            constituency = None
-            if boundaries_gdf is not None and boundaries_spatial_index is not None: # Check if boundaries loaded
-                try:
-                    point = Point(lon, lat)
-                    possible_matches_index = list(boundaries_spatial_index.intersection(point.bounds))
-                    if possible_matches_index:
-                        possible_matches = boundaries_gdf.iloc[possible_matches_index]
-                        precise_matches = possible_matches[possible_matches.geometry.contains(point)]
-                        if not precise_matches.empty: constituency = precise_matches.iloc[0][CONSTITUENCY_COLUMN_NAME]
-                except Exception as e: log.error(f"Error during point-in-polygon check for ({lat}, {lon}): {e}")
-            grouped_by_coords[coord_key] = {'latitude': lat, 'longitude': lon, 'location_name': article['location_name'], 'constituency': constituency, 'articles': []}
-        if not any(a['url'] == article['url'] for a in grouped_by_coords[coord_key]['articles']):
-             grouped_by_coords[coord_key]['articles'].append({'title': article['title'], 'url': article['url'], 'summary': article['summary'], 'source': article['source']})
-
-    # --- 4. Format final cluster list ---
-    final_clusters = []
-    for data in grouped_by_coords.values():
-        final_clusters.append({'latitude': data['latitude'], 'longitude': data['longitude'], 'location_name': data['location_name'], 'constituency': data['constituency'], 'article_count': len(data['articles']), 'articles': data['articles']})
-    log.info(f"Grouped articles into {len(final_clusters)} coordinate clusters.")
-    return final_clusters
+            if loc not in location_coords: location_coords[loc] = resolve_location_coords(loc, geocoder)
+            if location_coords[loc]: return loc
+        return None
+    primary_locations = articles_df['_hits'].map(first_resolvable).dropna()
+    articles_df = articles_df.loc[primary_locations.index].assign(location_name=primary_locations)
+    log.info(f"Successfully geocoded {len(articles_df)} articles.")
+
+    # --- 3. Group by Coordinates & Find Constituency (one DataFrame groupby instead of per-cluster dicts) ---
+    if articles_df.empty:
+        log.info("Grouped articles into 0 coordinate clusters.")
+        return pd.DataFrame(columns=cluster_columns)
+    coords = pd.DataFrame(articles_df['location_name'].map(location_coords).tolist(), index=articles_df.index, columns=['latitude', 'longitude'])
+    articles_df = articles_df.join(coords)
+    articles_df['lat5'] = (articles_df['latitude'] * COORD_KEY_SCALE).round().astype('int64')
+    articles_df['lon5'] = (articles_df['longitude'] * COORD_KEY_SCALE).round().astype('int64')
+    articles_df['article'] = articles_df[['title', 'url', 'summary', 'source']].to_dict('records')
+    articles_df = articles_df.drop_duplicates(['lat5', 'lon5', 'url']) # Each URL once per cluster
+    clusters = articles_df.groupby(['lat5', 'lon5'], sort=False).agg(
+        latitude=('latitude', 'first'), longitude=('longitude', 'first'),
+        location_name=('location_name', 'first'), articles=('article', list)
+    ).reset_index(drop=True)
+    clusters['article_count'] = clusters['articles'].str.len()
+    clusters['constituency'] = None
+
+    # Constituency for every cluster in one vectorized STRtree query instead of a point-in-polygon loop. The tree is
+    # built over the (few) points and queried with the prepared polygons as input, so GEOS uses the prepared geometries
+    if _boundaries_gdf is not None: # Check if boundaries loaded
+        try:
+            points = shapely.points(clusters['longitude'].to_numpy(), clusters['latitude'].to_numpy())
+            boundary_idx, point_idx = shapely.STRtree(points).query(_boundaries_gdf.geometry.to_numpy(), predicate='contains') # (input, tree) index pairs
+            matches = pd.Series(_boundaries_gdf[CONSTITUENCY_COLUMN_NAME].to_numpy()[boundary_idx], index=clusters.index[point_idx])
+            # A point on a shared border can fall within two polygons; keep the first match
+            matches = matches[~matches.index.duplicated(keep='first')]
+            clusters.loc[matches.index, 'constituency'] = matches
+        except Exception as e: log.error(f"Error during point-in-polygon join for {len(clusters)} clusters: {e}", exc_info=True)
+
+    log.info(f"Grouped articles into {len(clusters)} coordinate clusters.")
+    return clusters[cluster_columns]
 
 
 # --- Streamlit App Layout ---
@@ -176,15 +325,15 @@ st.title("🇸🇬 News Map")
 st.write("Recent news articles clustered by location, overlaid on 2020 Electoral Boundaries.")
 
 # --- Load Data ---
-boundaries_gdf, _ = load_boundaries_data(ELECTORAL_BOUNDARIES_FILE)
-clusters = fetch_and_process_news(config.NEWS_SOURCES)
+boundaries_gdf = load_boundaries_data(ELECTORAL_BOUNDARIES_FILE)
+clusters = fetch_and_process_news(config.NEWS_SOURCES, boundaries_gdf, probe_feed_token(config.NEWS_SOURCES))
 
 # --- Create and Display Map ---
 map_center = [1.3521, 103.8198]
 map_zoom = 11
 
 # Create base map
-m = folium.Map(location=map_center, zoom_start=map_zoom, tiles="OpenStreetMap")
+m = folium.Map(location=map_center, zoom_start=map_zoom, tiles="OpenStreetMap", prefer_canvas=True)
 
 # --- Add Boundary Layer (MODIFIED with highlight_function) ---
 if boundaries_gdf is not None:
@@ -229,34 +378,46 @@ else:
     st.warning("Boundary data not loaded, cannot display boundary layer.")
 
 
-# --- Add News Cluster Markers (Keep as is) ---
+# --- Add News Cluster Markers ---
+# Markers are built client-side from plain [lat, lon, tooltip, popup] rows instead of one folium.Marker each
+MARKER_CALLBACK_JS = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'info-sign', markerColor: 'red', prefix: 'glyphicon'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindTooltip(row[2]);
+    marker.bindPopup(row[3], {maxWidth: 350});
+    return marker;
+}
+"""
+POPUP_LI_FMT = "<li style='margin-bottom: 5px;'><a href='{url}' target='_blank'>{title}</a><br><small>({src})</small></li>"
+
 if clusters is None:
     st.error("Failed to load or process news data. Check logs.")
-elif not clusters:
+elif clusters.empty:
     st.warning("No relevant news articles found or processed.")
 else:
     log.info(f"Adding {len(clusters)} news clusters to the map...")
-    for cluster in clusters:
-        # ... (Keep marker creation logic exactly the same) ...
-        lat = cluster['latitude']
-        lon = cluster['longitude']
-        count = cluster['article_count']
-        loc_name = cluster.get('location_name', 'Location')
-        constituency = cluster.get('constituency', None)
+    marker_rows = []
+    for cluster in clusters.itertuples(index=False):
+        lat = cluster.latitude
+        lon = cluster.longitude
+        count = cluster.article_count
+        loc_name = cluster.location_name or 'Location'
+        constituency = cluster.constituency
         tooltip_text = f"{loc_name} ({count} articles)"
         if constituency: tooltip_text += f"<br>Constituency: {constituency}"
         elif constituency is None and boundaries_gdf is not None: tooltip_text += f"<br>Constituency: Outside Boundaries"
-        popup_html = f"<b>{loc_name} ({count})</b>"
-        if constituency: popup_html += f"<br><small>Constituency: {constituency}</small>"
-        elif constituency is None and boundaries_gdf is not None: popup_html += f"<br><small>Constituency: Outside Boundaries</small>"
-        popup_html += "<hr style='margin: 3px 0;'>"
-        popup_html += "<ul style='padding-left: 15px; margin-top: 5px; max-height: 150px; overflow-y: auto;'>"
-        for article in cluster['articles']:
+        parts = [f"<b>{loc_name} ({count})</b>"]
+        if constituency: parts.append(f"<br><small>Constituency: {constituency}</small>")
+        elif constituency is None and boundaries_gdf is not None: parts.append("<br><small>Constituency: Outside Boundaries</small>")
+        parts.append("<hr style='margin: 3px 0;'><ul style='padding-left: 15px; margin-top: 5px; max-height: 150px; overflow-y: auto;'>")
+        for article in cluster.articles:
              safe_title = article['title'].replace('<', '<').replace('>', '>')
-             popup_html += f"<li style='margin-bottom: 5px;'><a href='{article['url']}' target='_blank'>{safe_title}</a><br><small>({article['source']})</small></li>"
-        popup_html += "</ul>"
-        popup = folium.Popup(popup_html, max_width=350)
-        folium.Marker(location=[lat, lon], tooltip=tooltip_text, popup=popup, icon=folium.Icon(color='red', icon='info-sign')).add_to(m)
+             parts.append(POPUP_LI_FMT.format_map({'url': article['url'], 'title': safe_title, 'src': article['source']}))
+        parts.append("</ul>")
+        popup_html = ''.join(parts)
+        marker_rows.append([lat, lon, tooltip_text, popup_html])
+    FastMarkerCluster(data=marker_rows, callback=MARKER_CALLBACK_JS, name='News Clusters').add_to(m)
     log.info("News cluster markers added.")
 
 # --- Add Layer Control (Keep as is) ---